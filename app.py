@@ -4,30 +4,331 @@ Meshtastic Channel URL Decoder
 A Flask web application that decodes Meshtastic channel URLs and their encoded protobufs.
 """
 
-import base64
-import json
+import bisect
+import copy
+import functools
+import hashlib
+import importlib
 import io
+import math
+import multiprocessing
+import os
+import re
+import threading
+import warnings
 from urllib.parse import urlparse, parse_qs
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, List, Optional, Tuple
 
-from flask import Flask, render_template, request, jsonify
+# pybase64 is a SIMD-accelerated drop-in replacement for the stdlib base64 module
+# (its non-validating decode differs on malformed input, see _b64decode_lenient)
+import base64 as stdlib_base64
+try:
+    import pybase64 as base64
+    BASE64_BACKEND = f'pybase64 {base64.get_version()}'
+except ImportError:
+    base64 = stdlib_base64
+    BASE64_BACKEND = 'stdlib'
+
+# zxing-cpp is an optional, faster QR reader tried before OpenCV and pyzbar
+try:
+    import zxingcpp
+except ImportError:
+    zxingcpp = None
+
+# Prefer the compiled upb/C++ protobuf runtime over pure Python; this must be set
+# before the first generated *_pb2 module is imported
+os.environ.setdefault('PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION', 'upb')
+
+from flask import Flask, Request, render_template, request, jsonify, send_file
+from flask.json.provider import DefaultJSONProvider
 from meshtastic.protobuf import channel_pb2, apponly_pb2, mesh_pb2, config_pb2
+from google.protobuf.descriptor import FieldDescriptor
+from google.protobuf.internal import api_implementation, type_checkers
 from google.protobuf.message import DecodeError
 from google.protobuf.json_format import MessageToDict
+from werkzeug.exceptions import RequestEntityTooLarge
 from PIL import Image
 from pyzbar import pyzbar
-import cv2
+from pyzbar.locations import Rect
 import numpy as np
+import orjson
 import qrcode
 from qrcode.constants import ERROR_CORRECT_L
 
 from io import BytesIO
 
+# The decoder and encoder are dominated by protobuf parsing/serialization, which is
+# an order of magnitude slower on the pure-Python runtime
+if api_implementation.Type() not in ('upb', 'cpp'):
+    warnings.warn(
+        f"protobuf is using the '{api_implementation.Type()}' implementation; "
+        "install protobuf>=4.21 for the much faster upb backend",
+        RuntimeWarning
+    )
+
+class _LazyModule:
+    """Module proxy that defers the actual import until an attribute is first used"""
+    
+    def __init__(self, name: str, on_load=None):
+        self._name = name
+        self._on_load = on_load
+        self._module = None
+    
+    def __getattr__(self, attr):
+        if self._module is None:
+            module = importlib.import_module(self._name)
+            if self._on_load is not None:
+                self._on_load(module)
+            self._module = module
+        return getattr(self._module, attr)
+
+def _configure_opencv(module):
+    """Make sure OpenCV's SIMD kernels and internal thread pool are enabled"""
+    # Some WSGI setups leave OpenCV single-threaded; half the cores leaves room for
+    # the scan pool, which runs several preprocessing variants concurrently
+    module.setUseOptimized(True)
+    module.setNumThreads(max(1, (os.cpu_count() or 1) // 2))
+
+# OpenCV is large and slow to import, and only QR image uploads need it; the
+# decoder/encoder (and the decode.py CLI, which imports this module) never load it
+cv2 = _LazyModule('cv2', on_load=_configure_opencv)
+
+# Maximum accepted size of an uploaded QR code image
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
+
+# Image file extensions accepted by /upload_qr
+ALLOWED_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp'})
+
+class UploadRequest(Request):
+    """Request that keeps uploaded files in memory instead of spooling them to a temp file"""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # MAX_CONTENT_LENGTH bounds the whole body, so an upload always fits in memory
+        return BytesIO()
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that serializes responses and parses request bodies with orjson"""
+    
+    # Keep Flask's sorted-key output so response bodies are unchanged
+    option = orjson.OPT_SORT_KEYS
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.option).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # orjson produces bytes, which can go straight into the response body
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.option),
+            mimetype=self.mimetype
+        )
+
 app = Flask(__name__)
+app.request_class = UploadRequest
+app.json = OrjsonProvider(app)
+# Reject oversized bodies before they are read, leaving headroom for the multipart envelope
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_SIZE + 64 * 1024
+
+# Protobuf wire type for each non-varint field type (everything else is a varint)
+_WIRE_TYPES = {
+    FieldDescriptor.TYPE_DOUBLE: 1,
+    FieldDescriptor.TYPE_FIXED64: 1,
+    FieldDescriptor.TYPE_SFIXED64: 1,
+    FieldDescriptor.TYPE_STRING: 2,
+    FieldDescriptor.TYPE_BYTES: 2,
+    FieldDescriptor.TYPE_MESSAGE: 2,
+    FieldDescriptor.TYPE_GROUP: 3,
+    FieldDescriptor.TYPE_FLOAT: 5,
+    FieldDescriptor.TYPE_FIXED32: 5,
+    FieldDescriptor.TYPE_SFIXED32: 5,
+}
+
+@functools.lru_cache(maxsize=None)
+def _is_repeated(field) -> bool:
+    """Whether a field is repeated, across protobuf versions"""
+    # Newer protobuf releases drop FieldDescriptor.label in favour of is_repeated,
+    # which older releases (e.g. 5.x) do not have yet
+    is_repeated = getattr(field, 'is_repeated', None)
+    if is_repeated is not None:
+        return is_repeated
+    return field.label == FieldDescriptor.LABEL_REPEATED
+
+def _wire_schema(message_type) -> Dict[int, frozenset]:
+    """Map each field number of a protobuf message type to the wire types it may be encoded with"""
+    schema = {}
+    for field in message_type.DESCRIPTOR.fields:
+        wire_type = _WIRE_TYPES.get(field.type, 0)
+        if _is_repeated(field) and wire_type != 2:
+            # Repeated scalars may also arrive packed (length-delimited)
+            schema[field.number] = frozenset((wire_type, 2))
+        else:
+            schema[field.number] = frozenset((wire_type,))
+    return schema
+
+def _fast_message_to_dict(message) -> Optional[Dict[str, Any]]:
+    """
+    Convert a protobuf message to the same dict MessageToDict would produce
+    (with preserving_proto_field_name=True), reading only its populated fields
+    
+    Returns:
+        The dictionary, or None if the message uses features that need the full
+        MessageToDict (map fields, extensions, well-known types, NaN/Infinity)
+    """
+    result = {}
+    for field, value in message.ListFields():
+        convert = _field_converter(field)
+        if convert is None:
+            return None
+        
+        if _is_repeated(field):
+            value = [convert(item) for item in value]
+            if None in value:
+                return None
+        else:
+            value = convert(value)
+            if value is None:
+                return None
+        result[field.name] = value
+    return result
+
+def _message_to_dict(message) -> Dict[str, Any]:
+    """Convert a protobuf message to a dict, avoiding MessageToDict's reflective printer where possible"""
+    message_dict = _fast_message_to_dict(message)
+    if message_dict is None:
+        message_dict = MessageToDict(message, preserving_proto_field_name=True)
+    return message_dict
+
+def _json_identity(value):
+    return value
+
+def _json_int64(value):
+    # JSON mapping renders 64-bit integers as strings
+    return str(value)
+
+def _json_bytes(value):
+    return base64.b64encode(value).decode('utf-8')
+
+def _json_double(value):
+    if math.isnan(value) or math.isinf(value):
+        return None
+    return value
+
+def _json_float(value):
+    if math.isnan(value) or math.isinf(value):
+        return None
+    # Same shortest round-trip representation MessageToDict uses for 32-bit floats
+    return type_checkers.ToShortestFloat(value)
+
+@functools.lru_cache(maxsize=None)
+def _field_converter(field):
+    """
+    Return the function converting a single value of this field following the protobuf
+    JSON mapping (it returns None for values that need MessageToDict), or None if the
+    field itself is unsupported
+    
+    Resolved once per field descriptor so conversion does not re-inspect the field type
+    for every value.
+    """
+    if field.is_extension:
+        return None
+    cpp_type = field.cpp_type
+    if cpp_type == FieldDescriptor.CPPTYPE_MESSAGE:
+        # Map fields and well-known types (Timestamp, Any, ...) have their own JSON representations
+        if field.message_type.GetOptions().map_entry or field.message_type.full_name.startswith('google.protobuf.'):
+            return None
+        return _fast_message_to_dict
+    if cpp_type in (FieldDescriptor.CPPTYPE_INT32, FieldDescriptor.CPPTYPE_UINT32, FieldDescriptor.CPPTYPE_BOOL):
+        return _json_identity
+    if cpp_type in (FieldDescriptor.CPPTYPE_INT64, FieldDescriptor.CPPTYPE_UINT64):
+        return _json_int64
+    if cpp_type == FieldDescriptor.CPPTYPE_STRING:
+        return _json_bytes if field.type == FieldDescriptor.TYPE_BYTES else _json_identity
+    if cpp_type == FieldDescriptor.CPPTYPE_ENUM:
+        names = {number: value.name for number, value in field.enum_type.values_by_number.items()}
+        return lambda value: names.get(value, value)
+    if cpp_type == FieldDescriptor.CPPTYPE_FLOAT:
+        return _json_float
+    if cpp_type == FieldDescriptor.CPPTYPE_DOUBLE:
+        return _json_double
+    return None
+
+def _read_varint(data: bytes, pos: int):
+    """Read a base-128 varint from data at pos, returning (value, new_pos)"""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+        if shift >= 64:
+            raise ValueError("Varint too long")
+
+# Translation table from the base64url alphabet to standard base64
+_B64URL_TO_B64 = bytes.maketrans(b'-_', b'+/')
+
+def _b64decode_lenient(data) -> bytes:
+    """
+    Decode base64 exactly like the stdlib's non-validating b64decode
+    
+    Well-formed input takes the (possibly pybase64) validating decoder; anything it
+    rejects is handed to the stdlib, whose handling of stray characters and padding
+    pybase64 does not reproduce.
+    """
+    try:
+        return base64.b64decode(data, validate=True)
+    except ValueError:
+        return stdlib_base64.b64decode(data)
+
+# Channel (/e/) and node (/v/) URLs carrying a base64url payload in the fragment
+_MESHTASTIC_URL_RE = re.compile(r'/([ev])/#([A-Za-z0-9_\-+/=]+)$')
+
+# Longest URL kept in the decode cache: the byte capacity of the largest QR code
+# (version 40, error correction level L)
+MAX_CACHED_URL_LENGTH = 2953
 
 class MeshtasticDecoder:
     """Handles decoding of Meshtastic channel URLs and protobuf data"""
     
+    __slots__ = ('_tls', '_decode_cached')
+    
+    # Candidate message types in the order they are tried: (message type, result key, validator)
+    _NODE_DECODERS = (
+        (mesh_pb2.NodeInfo, 'Node', '_validate_node'),
+        (mesh_pb2.User, 'User', '_validate_user'),
+        (mesh_pb2.Position, 'Position', '_validate_position'),
+        (mesh_pb2.MyNodeInfo, 'MyNodeInfo', '_validate_my_node'),
+    )
+    _CHANNEL_DECODERS = (
+        (apponly_pb2.ChannelSet, 'Config', '_validate_channel_set'),
+        (channel_pb2.Channel, 'Config', '_validate_channel'),
+    )
+    # MeshPacket is tried as a last resort and accepted without validation
+    _FALLBACK_DECODERS = (
+        (mesh_pb2.MeshPacket, 'MeshPacket', None),
+    )
+    
+    _WIRE_SCHEMAS = {
+        message_type: _wire_schema(message_type)
+        for message_type, _, _ in _NODE_DECODERS + _CHANNEL_DECODERS + _FALLBACK_DECODERS
+    }
+    
+    def __init__(self):
+        # Per-thread protobuf message instances, reused across decode attempts
+        self._tls = threading.local()
+        # Decoding is a pure function of the URL, so repeat lookups are served from an LRU cache.
+        # Only URLs up to MAX_CACHED_URL_LENGTH are cached, which bounds an entry (URL, payload,
+        # hex dump) to roughly 12KB and the whole cache to about 50MB even for hostile input;
+        # real configs are a few hundred bytes
+        self._decode_cached = functools.lru_cache(maxsize=4096)(self._decode_channel_url)
+    
     def decode_channel_url(self, url: str) -> Dict[str, Any]:
         """
         Decode a Meshtastic channel URL and return channel information
@@ -38,20 +339,24 @@ class MeshtasticDecoder:
         Returns:
             Dictionary containing decoded channel information
         """
+        # Longer URLs cannot come from a QR code, so they are decoded without being cached
+        if len(url) > MAX_CACHED_URL_LENGTH:
+            return self._decode_channel_url(url)
+        
+        # Cached results are shared, so give each caller its own top-level dict
+        return dict(self._decode_cached(url))
+    
+    def _decode_channel_url(self, url: str) -> Dict[str, Any]:
+        """Decode a Meshtastic channel URL without consulting the cache"""
         try:
-            # Parse the URL
-            parsed_url = urlparse(url)
-            
-            # Extract the fragment (part after #)
-            if parsed_url.fragment:
-                encoded_data = parsed_url.fragment
+            # Fast path for the usual https://meshtastic.org/{e,v}/#<base64url> form, which
+            # yields the URL type and the payload from a single match
+            match = _MESHTASTIC_URL_RE.search(url)
+            if match:
+                url_type, encoded_data = match.groups()
             else:
-                # Check if it's in query parameters
-                query_params = parse_qs(parsed_url.query)
-                if 'c' in query_params:
-                    encoded_data = query_params['c'][0]
-                else:
-                    raise ValueError("No encoded channel data found in URL")
+                url_type = None
+                encoded_data = self._extract_encoded_data(url)
             
             # Decode the base64url encoded data
             decoded_data = self._base64url_decode(encoded_data)
@@ -60,41 +365,37 @@ class MeshtasticDecoder:
             decode_attempts = []
             
             # Detect URL type to prioritize attempts
-            is_node_url = '/v/' in url  # Node URLs typically use /v/ path
-            is_channel_url = '/e/' in url  # Channel URLs typically use /e/ path
+            if url_type is not None:
+                is_node_url = url_type == 'v'
+            else:
+                is_node_url = '/v/' in url  # Node URLs typically use /v/ path
             
             if is_node_url:
-                # For node URLs, try node-related types first
-                result = self._try_node_decoders(decoded_data, url, decode_attempts)
-                if result:
-                    return result
-                    
-                # Then try channel types as fallback
-                result = self._try_channel_decoders(decoded_data, url, decode_attempts)
-                if result:
-                    return result
+                # For node URLs, try node-related types first, then channel types as fallback
+                preferred, others = self._NODE_DECODERS, self._CHANNEL_DECODERS
             else:
-                # For channel URLs or unknown, try channel types first
-                result = self._try_channel_decoders(decoded_data, url, decode_attempts)
-                if result:
-                    return result
-                    
-                # Then try node types as fallback
-                result = self._try_node_decoders(decoded_data, url, decode_attempts)
+                # For channel URLs or unknown, try channel types first, then node types as fallback
+                preferred, others = self._CHANNEL_DECODERS, self._NODE_DECODERS
+            
+            # A payload shorter than one tag plus one value byte cannot hold any data
+            if len(decoded_data) < 2:
+                decoders = ()
+            else:
+                # Within each group, try message types whose schema accepts the payload's wire
+                # tags first. The sniff only reorders: a payload with fields newer than our
+                # protobufs can be mis-sniffed, so the URL type's group always comes first and
+                # every decoder is still tried
+                candidates = self._sniff_message_types(decoded_data)
+                decoders = (
+                    self._order_by_candidates(preferred, candidates) +
+                    self._order_by_candidates(others, candidates) +
+                    self._FALLBACK_DECODERS
+                )
+            
+            for message_type, result_key, validator in decoders:
+                result = self._try_decoder(message_type, result_key, validator, decoded_data, url, decode_attempts)
                 if result:
                     return result
-                    
-            # Try MeshPacket as a last resort
-            try:
-                packet = mesh_pb2.MeshPacket()
-                packet.ParseFromString(decoded_data)
-                return {
-                    'success': True,
-                    'url': url,
-                    'MeshPacket': MessageToDict(packet, preserving_proto_field_name=True)
-                }
-            except Exception as e:
-                decode_attempts.append(f'MeshPacket failed: {str(e)}')
             
             # If still nothing works, return detailed diagnostic info
             return {
@@ -106,8 +407,7 @@ class MeshtasticDecoder:
                     'encoded_data': encoded_data,
                     'encoded_length': len(encoded_data),
                     'decoded_length': len(decoded_data),
-                    'hex_data': decoded_data.hex(),
-                    'raw_bytes': list(decoded_data)  # Show raw bytes for debugging
+                    'hex_data': decoded_data.hex()  # Show raw bytes for debugging
                 }
             }
             
@@ -118,304 +418,288 @@ class MeshtasticDecoder:
                 'url': url
             }
     
-    def _base64url_decode(self, data: str) -> bytes:
-        """Decode base64url encoded string"""
-        # Add padding if necessary
-        missing_padding = len(data) % 4
-        if missing_padding:
-            data += '=' * (4 - missing_padding)
+    def _extract_encoded_data(self, url: str) -> str:
+        """Extract the encoded payload from a URL's fragment or its 'c' query parameter"""
+        # Extract the fragment (part after #)
+        fragment = url.partition('#')[2]
+        if fragment:
+            return fragment
         
-        # Replace URL-safe characters
-        data = data.replace('-', '+').replace('_', '/')
+        # Check if it's in query parameters
+        query_params = parse_qs(urlparse(url).query)
+        if 'c' in query_params:
+            return query_params['c'][0]
         
-        try:
-            return base64.b64decode(data)
-        except Exception as e:
-            # Try alternative decoding if standard fails
-            try:
-                return base64.urlsafe_b64decode(data)
-            except Exception:
-                raise ValueError(f"Failed to decode base64 data: {e}")
+        raise ValueError("No encoded channel data found in URL")
     
-    def _try_node_decoders(self, decoded_data: bytes, url: str, decode_attempts: list) -> Optional[Dict[str, Any]]:
-        """Try node-related protobuf message types"""
+    def _message(self, message_type):
+        """Return a cleared, per-thread reusable instance of the given protobuf message type"""
+        messages = getattr(self._tls, 'messages', None)
+        if messages is None:
+            messages = self._tls.messages = {}
         
-        # Try NodeInfo
+        message = messages.get(message_type)
+        if message is None:
+            message = messages[message_type] = message_type()
+        else:
+            message.Clear()
+        return message
+    
+    def _base64url_decode(self, data: str) -> bytes:
+        """Decode base64url encoded string"""
         try:
-            node = mesh_pb2.NodeInfo()
-            node.ParseFromString(decoded_data)
-            node_dict = MessageToDict(node, preserving_proto_field_name=True)
-            # Validate that this looks like real node data
-            if self._validate_node_data(node_dict):
-                return {
-                    'success': True,
-                    'url': url,
-                    'Node': node_dict
-                }
+            # A single bytes.translate pass maps '-' and '_' onto '+' and '/', so the
+            # standard decoder handles both alphabets without a second attempt
+            encoded = data.encode('ascii').translate(_B64URL_TO_B64)
+            
+            # Add padding if necessary
+            encoded += b'=' * (-len(encoded) % 4)
+            
+            return _b64decode_lenient(encoded)
         except Exception as e:
-            decode_attempts.append(f'NodeInfo failed: {str(e)}')
+            raise ValueError(f"Failed to decode base64 data: {e}")
+    
+    def _order_by_candidates(self, decoders: tuple, candidates) -> tuple:
+        """Move decoders whose message type is among the sniffed candidates to the front"""
+        if not candidates:
+            return decoders
+        return (
+            tuple(entry for entry in decoders if entry[0] in candidates) +
+            tuple(entry for entry in decoders if entry[0] not in candidates)
+        )
+    
+    def _sniff_message_types(self, data: bytes) -> Optional[frozenset]:
+        """
+        Peek at the top-level wire tags of a protobuf payload without parsing it
         
-        # Try User message (often in node URLs)
+        Returns:
+            The set of candidate message types whose schema accepts every
+            (field number, wire type) pair present, or None if the payload is
+            not well-formed protobuf wire data
+        """
+        fields = self._peek_fields(data)
+        if fields is None:
+            return None
+        return self._candidates_for_fields(fields)
+    
+    @classmethod
+    @functools.lru_cache(maxsize=256)
+    def _candidates_for_fields(cls, fields: frozenset) -> frozenset:
+        """Match a set of (field number, wire type) pairs against the known message schemas"""
+        # Payloads of the same kind share a handful of field layouts, so this is memoized
+        return frozenset(
+            message_type for message_type, schema in cls._WIRE_SCHEMAS.items()
+            if all(wire_type in schema.get(field_number, ()) for field_number, wire_type in fields)
+        )
+    
+    def _peek_fields(self, data: bytes) -> Optional[frozenset]:
+        """Collect the top-level (field number, wire type) pairs of a payload, or None if malformed"""
+        fields = set()
+        pos = 0
+        end = len(data)
         try:
-            user = mesh_pb2.User()
-            user.ParseFromString(decoded_data)
-            user_dict = MessageToDict(user, preserving_proto_field_name=True)
-            # Validate that this looks like real user data
-            if self._validate_user_data(user_dict):
-                return {
-                    'success': True,
-                    'url': url,
-                    'User': user_dict
-                }
-        except Exception as e:
-            decode_attempts.append(f'User failed: {str(e)}')
+            while pos < end:
+                # Tags and lengths almost always fit in one byte, so only
+                # fall back to the general varint reader for longer ones
+                tag = data[pos]
+                if tag < 0x80:
+                    pos += 1
+                else:
+                    tag, pos = _read_varint(data, pos)
+                field_number = tag >> 3
+                wire_type = tag & 0x07
+                if field_number == 0:
+                    return None
+                
+                # Skip over the field's payload
+                if wire_type == 0:
+                    # Varint values are skipped without decoding them
+                    while data[pos] & 0x80:
+                        pos += 1
+                    pos += 1
+                elif wire_type == 1:
+                    pos += 8
+                elif wire_type == 2:
+                    length = data[pos]
+                    if length < 0x80:
+                        pos += 1
+                    else:
+                        length, pos = _read_varint(data, pos)
+                    pos += length
+                elif wire_type == 5:
+                    pos += 4
+                else:
+                    return None
+                fields.add((field_number, wire_type))
+        except (IndexError, ValueError):
+            return None
         
-        # Try Position message
-        try:
-            position = mesh_pb2.Position()
-            position.ParseFromString(decoded_data)
-            position_dict = MessageToDict(position, preserving_proto_field_name=True)
-            if self._validate_position_data(position_dict):
-                return {
-                    'success': True,
-                    'url': url,
-                    'Position': position_dict
-                }
-        except Exception as e:
-            decode_attempts.append(f'Position failed: {str(e)}')
+        if pos != end or not fields:
+            return None
         
-        # Try MyNodeInfo
-        try:
-            my_node = mesh_pb2.MyNodeInfo()
-            my_node.ParseFromString(decoded_data)
-            my_node_dict = MessageToDict(my_node, preserving_proto_field_name=True)
-            if my_node_dict:  # Basic validation
-                return {
-                    'success': True,
-                    'url': url,
-                    'MyNodeInfo': my_node_dict
-                }
-        except Exception as e:
-            decode_attempts.append(f'MyNodeInfo failed: {str(e)}')
-        
-        return None
+        return frozenset(fields)
     
-    def _try_channel_decoders(self, decoded_data: bytes, url: str, decode_attempts: list) -> Optional[Dict[str, Any]]:
-        """Try channel-related protobuf message types"""
-        
-        # Try to decode as ChannelSet first
-        try:
-            channel_set = apponly_pb2.ChannelSet()
-            channel_set.ParseFromString(decoded_data)
-            config_dict = MessageToDict(channel_set, preserving_proto_field_name=True)
-            # Validate that this looks like real channel data
-            if self._validate_channel_set_data(config_dict):
-                return {
-                    'success': True,
-                    'url': url,
-                    'Config': config_dict
-                }
-        except Exception as e:
-            decode_attempts.append(f'ChannelSet failed: {str(e)}')
-        
-        # Try to decode as single Channel
+    def _try_decoder(self, message_type, result_key: str, validator: Optional[str], decoded_data: bytes, url: str, decode_attempts: list) -> Optional[Dict[str, Any]]:
+        """Try to parse the data as a single protobuf message type"""
         try:
-            channel = channel_pb2.Channel()
-            channel.ParseFromString(decoded_data)
-            config_dict = MessageToDict(channel, preserving_proto_field_name=True)
-            if self._validate_channel_data(config_dict):
+            message = self._message(message_type)
+            message.ParseFromString(decoded_data)
+            # Validate that this looks like real data of this type before paying for
+            # the dict conversion, which is only done for the winning candidate
+            if validator is None or getattr(self, validator)(message):
                 return {
                     'success': True,
                     'url': url,
-                    'Config': config_dict
+                    result_key: _message_to_dict(message)
                 }
-        except Exception as e:
-            decode_attempts.append(f'SingleChannel failed: {str(e)}')
+        except DecodeError as e:
+            decode_attempts.append(f'{message_type.DESCRIPTOR.name} failed: {str(e)}')
         
         return None
     
-    def _validate_node_data(self, data: Dict[str, Any]) -> bool:
-        """Validate that decoded data looks like real NodeInfo"""
+    def _validate_node(self, node: mesh_pb2.NodeInfo) -> bool:
+        """Validate that a parsed message looks like real NodeInfo"""
         # NodeInfo should have node number or user info
-        return bool(data.get('num') or data.get('user'))
+        return bool(node.num or (node.HasField('user') and node.user.ListFields()))
     
-    def _validate_user_data(self, data: Dict[str, Any]) -> bool:
-        """Validate that decoded data looks like real User data"""
+    def _validate_user(self, user: mesh_pb2.User) -> bool:
+        """Validate that a parsed message looks like real User data"""
         # User should have id, long_name, or short_name
-        return bool(data.get('id') or data.get('long_name') or data.get('short_name'))
+        return bool(user.id or user.long_name or user.short_name)
     
-    def _validate_position_data(self, data: Dict[str, Any]) -> bool:
-        """Validate that decoded data looks like real Position data"""
+    def _validate_position(self, position: mesh_pb2.Position) -> bool:
+        """Validate that a parsed message looks like real Position data"""
         # Position should have latitude, longitude, or other location fields
-        return bool(data.get('latitude_i') or data.get('longitude_i') or data.get('altitude'))
+        return bool(position.latitude_i or position.longitude_i or position.altitude)
+    
+    def _validate_my_node(self, my_node: mesh_pb2.MyNodeInfo) -> bool:
+        """Validate that a parsed message looks like real MyNodeInfo"""
+        # Basic validation: any populated field
+        return bool(my_node.ListFields())
     
-    def _validate_channel_set_data(self, data: Dict[str, Any]) -> bool:
-        """Validate that decoded data looks like real ChannelSet data"""
-        # ChannelSet should have settings or channels
-        return bool(data.get('settings') or data.get('channels') or data.get('lora_config'))
+    def _validate_channel_set(self, channel_set: apponly_pb2.ChannelSet) -> bool:
+        """Validate that a parsed message looks like real ChannelSet data"""
+        # ChannelSet should have settings or LoRa config
+        return bool(len(channel_set.settings) or (channel_set.HasField('lora_config') and channel_set.lora_config.ListFields()))
     
-    def _validate_channel_data(self, data: Dict[str, Any]) -> bool:
-        """Validate that decoded data looks like real Channel data"""
+    def _validate_channel(self, channel: channel_pb2.Channel) -> bool:
+        """Validate that a parsed message looks like real Channel data"""
         # Channel should have settings, role, or index
-        return bool(data.get('settings') or data.get('role') is not None or data.get('index') is not None)
+        return bool((channel.HasField('settings') and channel.settings.ListFields()) or channel.role or channel.index)
+
+# Protobuf message classes built by the encoder, bound once instead of resolved per call
+ChannelSet = apponly_pb2.ChannelSet
+Channel = channel_pb2.Channel
+LoRaConfig = config_pb2.Config.LoRaConfig
+
+# Channel role names accepted by the encoder
+ROLE_MAP = {
+    'primary': Channel.Role.PRIMARY,
+    'secondary': Channel.Role.SECONDARY,
+    'disabled': Channel.Role.DISABLED
+}
+DEFAULT_ROLE = Channel.Role.SECONDARY
+
+# LoRa enum types; names given to the encoder are resolved through their descriptors
+ModemPreset = LoRaConfig.ModemPreset
+RegionCode = LoRaConfig.RegionCode
+
+# Well-formed PSKs that can be decoded without trial and error: 0x-prefixed hex, or
+# standard base64 with valid padding
+_PSK_HEX_RE = re.compile(r'0x((?:[0-9a-fA-F]{2})*)')
+_PSK_BASE64_RE = re.compile(r'(?:[A-Za-z0-9+/]{4})*(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?')
+
+def _parse_psk(psk_str: str) -> bytes:
+    """Convert a PSK given as 0x-prefixed hex, base64 or plain text to key bytes"""
+    # Well-formed keys are recognised by their shape and decoded directly; anything
+    # else goes through the lenient parsers, in the order they have always been tried
+    hex_match = _PSK_HEX_RE.fullmatch(psk_str)
+    if hex_match:
+        return bytes.fromhex(hex_match.group(1))
+    if not psk_str.startswith('0x') and _PSK_BASE64_RE.fullmatch(psk_str):
+        return base64.b64decode(psk_str)
+    try:
+        if psk_str.startswith('0x'):
+            return bytes.fromhex(psk_str[2:])
+        # Try as base64 (non-validating: characters outside the alphabet are ignored)
+        return _b64decode_lenient(psk_str)
+    except ValueError:
+        # If all else fails, use as UTF-8 bytes (not recommended but fallback)
+        return psk_str.encode('utf-8')[:32]  # Limit to 32 bytes
+
+# Scalar LoRaConfig fields accepted by the encoder and the type each value is coerced to
+LORA_FIELD_TYPES = {
+    'use_preset': bool,
+    'bandwidth': int,  # Used as-is (no unit conversion)
+    'spread_factor': int,
+    'coding_rate': int,
+    'frequency_offset': float,
+    'hop_limit': int,
+    'tx_enabled': bool,
+    'tx_power': int,
+    'channel_num': int,
+    'override_duty_cycle': bool,
+    'sx126x_rx_boosted_gain': bool,
+    'override_frequency': float
+}
+
+# Byte-mode capacity of QR code versions 1-40 at error correction level L
+QR_BYTE_CAPACITY_L = (
+    17, 32, 53, 78, 106, 134, 154, 192, 230, 271,
+    321, 367, 425, 458, 520, 586, 644, 718, 792, 858,
+    929, 1003, 1091, 1171, 1273, 1367, 1465, 1528, 1628, 1732,
+    1840, 1952, 2068, 2188, 2303, 2431, 2563, 2699, 2809, 2953
+)
 
 class MeshtasticEncoder:
     """Handles encoding of Meshtastic channel configurations into URLs and QR codes"""
     
-    def encode_channel_set(self, channels_data: List[Dict[str, Any]], lora_config_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def __init__(self):
+        # The same configuration always yields the same URL, so rendered QR codes are cached by URL
+        self._render_qr_png_cached = functools.lru_cache(maxsize=1024)(self._render_qr_png)
+    
+    def encode_channel_set(self, channels_data: List[Dict[str, Any]], lora_config_data: Optional[Dict[str, Any]] = None,
+                           include_qr_image: bool = True) -> Dict[str, Any]:
         """
         Encode multiple channels into a ChannelSet and create Meshtastic URL
         
         Args:
             channels_data: List of channel configuration dictionaries
             lora_config_data: Optional LoRa configuration dictionary
+            include_qr_image: Embed the QR code PNG as base64 (otherwise only qr_code_url points to it)
             
         Returns:
             Dictionary containing URL, QR code data, and success status
         """
         try:
             # Create ChannelSet protobuf
-            channel_set = apponly_pb2.ChannelSet()
+            channel_set = ChannelSet()
             
             for i, channel_data in enumerate(channels_data):
-                # Create Channel protobuf
-                channel = channel_pb2.Channel()
-                channel.index = i
-                
-                # Set channel role
-                role_map = {
-                    'primary': channel_pb2.Channel.Role.PRIMARY,
-                    'secondary': channel_pb2.Channel.Role.SECONDARY,
-                    'disabled': channel_pb2.Channel.Role.DISABLED
-                }
-                channel.role = role_map.get(channel_data.get('role', 'secondary'), channel_pb2.Channel.Role.SECONDARY)
-                
-                # Create channel settings
-                settings = channel_pb2.ChannelSettings()
-                
-                if channel_data.get('name'):
-                    settings.name = channel_data['name']
-                
-                if channel_data.get('psk'):
-                    # Convert PSK from hex string or base64 to bytes
-                    psk_str = channel_data['psk']
-                    try:
-                        if psk_str.startswith('0x'):
-                            settings.psk = bytes.fromhex(psk_str[2:])
-                        else:
-                            # Try as base64
-                            settings.psk = base64.b64decode(psk_str)
-                    except:
-                        # If all else fails, use as UTF-8 bytes (not recommended but fallback)
-                        settings.psk = psk_str.encode('utf-8')[:32]  # Limit to 32 bytes
-                
-                # Set uplink/downlink enabled flags
-                if 'uplink_enabled' in channel_data:
-                    settings.uplink_enabled = bool(channel_data['uplink_enabled'])
-                if 'downlink_enabled' in channel_data:
-                    settings.downlink_enabled = bool(channel_data['downlink_enabled'])
-                
-                # Always create module settings to ensure position_precision and is_muted are explicit
-                module_settings = channel_pb2.ModuleSettings()
-
-                if 'module_settings' in channel_data and isinstance(channel_data['module_settings'], dict):
-                    ms = channel_data['module_settings']
-
-                    if 'position_precision' in ms and ms['position_precision'] is not None:
-                        module_settings.position_precision = int(ms['position_precision'])
-                    else:
-                        # Default: position enabled with full precision
-                        module_settings.position_precision = 32
-
-                    # Per-channel mute flag (matches meshtastic/channel.proto: ModuleSettings.is_muted)
-                    # Accept a few common input keys for backward compatibility.
-                    for key in ('is_muted', 'muted', 'mute'):
-                        if key in ms:
-                            module_settings.is_muted = bool(ms[key])
-                            break
-                else:
-                    # Default: position enabled with full precision
-                    module_settings.position_precision = 32
-                
-                # Always set module settings
-                settings.module_settings.CopyFrom(module_settings)
-                
-                channel.settings.CopyFrom(settings)
-                channel_set.settings.append(channel.settings)
+                channel_set.settings.append(self._build_channel(channel_data, i).settings)
             
-            # Add LoRa config if provided
+            # Add LoRa config if provided, filled in place on the ChannelSet
             if lora_config_data:
-                lora_config = config_pb2.Config.LoRaConfig()
+                lora_config = channel_set.lora_config
+                lora_config.SetInParent()
+                
+                # Plain scalar fields, coerced to the field's Python type
+                for key, value in lora_config_data.items():
+                    cast = LORA_FIELD_TYPES.get(key)
+                    if cast is not None:
+                        setattr(lora_config, key, cast(value))
                 
-                if 'use_preset' in lora_config_data:
-                    lora_config.use_preset = bool(lora_config_data['use_preset'])
+                # Enum fields given by name, matched case-insensitively (legacy clients send lowercase)
                 if 'modem_preset' in lora_config_data:
-                    # Map preset names to integer values (updated for new values)
-                    preset_map = {
-                        'LONG_FAST': 0,       # LONG_FAST
-                        'LONG_SLOW': 1,       # LONG_SLOW  
-                        'VERY_LONG_SLOW': 2,  # VERY_LONG_SLOW
-                        'MEDIUM_SLOW': 3,     # MEDIUM_SLOW
-                        'MEDIUM_FAST': 4,     # MEDIUM_FAST
-                        'SHORT_SLOW': 5,      # SHORT_SLOW
-                        'SHORT_FAST': 6,      # SHORT_FAST
-                        'LONG_MODERATE': 7,   # LONG_MODERATE
-                        'SHORT_TURBO': 8,     # SHORT_TURBO
-                        # Legacy support
-                        'long_fast': 0,
-                        'long_slow': 1,
-                        'very_long_slow': 2,
-                        'medium_slow': 3,
-                        'medium_fast': 4,
-                        'short_slow': 5,
-                        'short_fast': 6
-                    }
-                    lora_config.modem_preset = preset_map.get(lora_config_data['modem_preset'], 0)
-                if 'bandwidth' in lora_config_data:
-                    # Use bandwidth value as-is (no unit conversion)
-                    lora_config.bandwidth = int(lora_config_data['bandwidth'])
-                if 'spread_factor' in lora_config_data:
-                    lora_config.spread_factor = int(lora_config_data['spread_factor'])
-                if 'coding_rate' in lora_config_data:
-                    lora_config.coding_rate = int(lora_config_data['coding_rate'])
-                if 'frequency_offset' in lora_config_data:
-                    lora_config.frequency_offset = float(lora_config_data['frequency_offset'])
-                if 'hop_limit' in lora_config_data:
-                    lora_config.hop_limit = int(lora_config_data['hop_limit'])
-                if 'tx_enabled' in lora_config_data:
-                    lora_config.tx_enabled = bool(lora_config_data['tx_enabled'])
-                if 'tx_power' in lora_config_data:
-                    lora_config.tx_power = int(lora_config_data['tx_power'])
-                if 'channel_num' in lora_config_data:
-                    lora_config.channel_num = int(lora_config_data['channel_num'])
-                if 'override_duty_cycle' in lora_config_data:
-                    lora_config.override_duty_cycle = bool(lora_config_data['override_duty_cycle'])
-                if 'sx126x_rx_boosted_gain' in lora_config_data:
-                    lora_config.sx126x_rx_boosted_gain = bool(lora_config_data['sx126x_rx_boosted_gain'])
-                if 'override_frequency' in lora_config_data:
-                    lora_config.override_frequency = float(lora_config_data['override_frequency'])
+                    try:
+                        lora_config.modem_preset = ModemPreset.Value(str(lora_config_data['modem_preset']).upper())
+                    except ValueError:
+                        lora_config.modem_preset = ModemPreset.LONG_FAST
                 if 'region' in lora_config_data:
-                    # Map region string to enum value
-                    region_map = {
-                        'US': 1,
-                        'EU_433': 2,
-                        'EU_868': 3,
-                        'CN': 4,
-                        'JP': 5,
-                        'ANZ': 6,
-                        'KR': 7,
-                        'TW': 8,
-                        'RU': 9,
-                        'IN': 10,
-                        'NZ_865': 11,
-                        'TH': 12,
-                        'LORA_24': 13,
-                        'UA_433': 14,
-                        'UA_868': 15
-                    }
-                    lora_config.region = region_map.get(lora_config_data['region'], 1)  # Default to US
-                    
-                channel_set.lora_config.CopyFrom(lora_config)
+                    try:
+                        lora_config.region = RegionCode.Value(str(lora_config_data['region']).upper())
+                    except ValueError:
+                        lora_config.region = RegionCode.US  # Default to US
             
             # Serialize the ChannelSet to bytes
             protobuf_data = channel_set.SerializeToString()
@@ -427,32 +711,24 @@ class MeshtasticEncoder:
             url = f"https://meshtastic.org/e/#{encoded_data}"
             
             # Generate QR code
-            qr_code_data = self._generate_qr_code(url)
+            qr_code_data = self._generate_qr_code(url, include_qr_image)
             
-            # Also decode the generated URL to provide config data in same format as decoder
-            decoder_instance = MeshtasticDecoder()
-            decoded_result = decoder_instance.decode_channel_url(url)
-            
-            # Build the response with both encoding and decoding information
-            response = {
+            # Build the response, including the config in the same format as the decoder
+            # (converted from the message just serialized rather than decoding the URL again)
+            result = {
                 'success': True,
                 'url': url,
                 'qr_code': qr_code_data,
                 'channels_count': len(channels_data),
-                'encoded_size': len(protobuf_data)
+                'encoded_size': len(protobuf_data),
+                'Config': _message_to_dict(channel_set)
             }
             
-            # Add decoded configuration data if decoding was successful
-            if decoded_result.get('success'):
-                if 'Config' in decoded_result:
-                    response['Config'] = decoded_result['Config']
-                else:
-                    # Handle other message types that might be returned
-                    for key in decoded_result:
-                        if key not in ['success', 'url']:
-                            response[key] = decoded_result[key]
+            # Point at the served QR image only if it could be generated
+            if qr_code_data['success']:
+                result['qr_code_url'] = f'/qr/e/{encoded_data}.png'
             
-            return response
+            return result
             
         except Exception as e:
             return {
@@ -460,79 +736,19 @@ class MeshtasticEncoder:
                 'error': f'Failed to encode channel set: {str(e)}'
             }
     
-    def encode_single_channel(self, channel_data: Dict[str, Any]) -> Dict[str, Any]:
+    def encode_single_channel(self, channel_data: Dict[str, Any], include_qr_image: bool = True) -> Dict[str, Any]:
         """
         Encode a single channel into a Channel protobuf and create Meshtastic URL
         
         Args:
             channel_data: Channel configuration dictionary
+            include_qr_image: Embed the QR code PNG as base64 (otherwise only qr_code_url points to it)
             
         Returns:
             Dictionary containing URL, QR code data, and success status
         """
         try:
-            # Create Channel protobuf
-            channel = channel_pb2.Channel()
-            channel.index = channel_data.get('index', 0)
-            
-            # Set channel role
-            role_map = {
-                'primary': channel_pb2.Channel.Role.PRIMARY,
-                'secondary': channel_pb2.Channel.Role.SECONDARY,
-                'disabled': channel_pb2.Channel.Role.DISABLED
-            }
-            channel.role = role_map.get(channel_data.get('role', 'secondary'), channel_pb2.Channel.Role.SECONDARY)
-            
-            # Create channel settings
-            settings = channel_pb2.ChannelSettings()
-            
-            if channel_data.get('name'):
-                settings.name = channel_data['name']
-            
-            if channel_data.get('psk'):
-                # Convert PSK from hex string or base64 to bytes
-                psk_str = channel_data['psk']
-                try:
-                    if psk_str.startswith('0x'):
-                        settings.psk = bytes.fromhex(psk_str[2:])
-                    else:
-                        # Try as base64
-                        settings.psk = base64.b64decode(psk_str)
-                except:
-                    # If all else fails, use as UTF-8 bytes (not recommended but fallback)
-                    settings.psk = psk_str.encode('utf-8')[:32]  # Limit to 32 bytes
-            
-            # Set uplink/downlink enabled flags
-            if 'uplink_enabled' in channel_data:
-                settings.uplink_enabled = bool(channel_data['uplink_enabled'])
-            if 'downlink_enabled' in channel_data:
-                settings.downlink_enabled = bool(channel_data['downlink_enabled'])
-            
-            # Always create module settings to ensure position_precision and is_muted are explicit
-            module_settings = channel_pb2.ModuleSettings()
-
-            if 'module_settings' in channel_data and isinstance(channel_data['module_settings'], dict):
-                ms = channel_data['module_settings']
-
-                if 'position_precision' in ms and ms['position_precision'] is not None:
-                    module_settings.position_precision = int(ms['position_precision'])
-                else:
-                    # Default: position enabled with full precision
-                    module_settings.position_precision = 32
-
-                # Per-channel mute flag (matches meshtastic/channel.proto: ModuleSettings.is_muted)
-                for key in ('is_muted', 'muted', 'mute'):
-                    if key in ms:
-                        module_settings.is_muted = bool(ms[key])
-                        break
-            else:
-                # Default: position enabled with full precision
-                module_settings.position_precision = 32
-            
-            # Always set module settings
-            settings.module_settings.CopyFrom(module_settings)
-            
-            channel.settings.CopyFrom(settings)
+            channel = self._build_channel(channel_data, channel_data.get('index', 0))
             
             # Serialize the Channel to bytes
             protobuf_data = channel.SerializeToString()
@@ -544,31 +760,23 @@ class MeshtasticEncoder:
             url = f"https://meshtastic.org/e/#{encoded_data}"
             
             # Generate QR code
-            qr_code_data = self._generate_qr_code(url)
+            qr_code_data = self._generate_qr_code(url, include_qr_image)
             
-            # Also decode the generated URL to provide config data in same format as decoder
-            decoder_instance = MeshtasticDecoder()
-            decoded_result = decoder_instance.decode_channel_url(url)
-            
-            # Build the response with both encoding and decoding information
-            response = {
+            # Build the response, including the config in the same format as the decoder
+            # (converted from the message just serialized rather than decoding the URL again)
+            result = {
                 'success': True,
                 'url': url,
                 'qr_code': qr_code_data,
-                'encoded_size': len(protobuf_data)
+                'encoded_size': len(protobuf_data),
+                'Config': _message_to_dict(channel)
             }
             
-            # Add decoded configuration data if decoding was successful
-            if decoded_result.get('success'):
-                if 'Config' in decoded_result:
-                    response['Config'] = decoded_result['Config']
-                else:
-                    # Handle other message types that might be returned
-                    for key in decoded_result:
-                        if key not in ['success', 'url']:
-                            response[key] = decoded_result[key]
+            # Point at the served QR image only if it could be generated
+            if qr_code_data['success']:
+                result['qr_code_url'] = f'/qr/e/{encoded_data}.png'
             
-            return response
+            return result
             
         except Exception as e:
             return {
@@ -576,78 +784,223 @@ class MeshtasticEncoder:
                 'error': f'Failed to encode single channel: {str(e)}'
             }
     
+    def _build_channel(self, channel_data: Dict[str, Any], index: int) -> Channel:
+        """Build a Channel protobuf from a channel configuration dictionary"""
+        channel = Channel()
+        channel.index = index
+        
+        # Set channel role
+        channel.role = ROLE_MAP.get(channel_data.get('role', 'secondary'), DEFAULT_ROLE)
+        
+        # Fill in the channel settings in place
+        settings = channel.settings
+        
+        if channel_data.get('name'):
+            settings.name = channel_data['name']
+        
+        if channel_data.get('psk'):
+            settings.psk = _parse_psk(channel_data['psk'])
+        
+        # Set uplink/downlink enabled flags
+        if 'uplink_enabled' in channel_data:
+            settings.uplink_enabled = bool(channel_data['uplink_enabled'])
+        if 'downlink_enabled' in channel_data:
+            settings.downlink_enabled = bool(channel_data['downlink_enabled'])
+        
+        # Always set module settings to ensure position_precision and is_muted are explicit
+        module_settings = settings.module_settings
+        module_settings.SetInParent()
+        
+        # Default: position enabled with full precision
+        module_settings.position_precision = 32
+        
+        ms = channel_data.get('module_settings')
+        if isinstance(ms, dict):
+            if ms.get('position_precision') is not None:
+                module_settings.position_precision = int(ms['position_precision'])
+            
+            # Per-channel mute flag (matches meshtastic/channel.proto: ModuleSettings.is_muted)
+            # Accept a few common input keys for backward compatibility.
+            for key in ('is_muted', 'muted', 'mute'):
+                if key in ms:
+                    module_settings.is_muted = bool(ms[key])
+                    break
+        
+        return channel
+    
     def _base64url_encode(self, data: bytes) -> str:
         """Encode bytes as base64url string"""
         # Use URL-safe base64 encoding and remove padding
         encoded = base64.urlsafe_b64encode(data).decode('ascii')
         return encoded.rstrip('=')
     
-    def _generate_qr_code(self, url: str) -> Dict[str, Any]:
+    def _qr_version(self, data_length: int) -> Optional[int]:
+        """Smallest QR version holding data_length bytes at ERROR_CORRECT_L, or None if too long"""
+        index = bisect.bisect_left(QR_BYTE_CAPACITY_L, data_length)
+        return index + 1 if index < len(QR_BYTE_CAPACITY_L) else None
+    
+    def qr_code_png(self, url: str) -> bytes:
+        """Return the QR code for the given URL as PNG bytes"""
+        return self._render_qr_png_cached(url)[0]
+    
+    def _generate_qr_code(self, url: str, include_image: bool = True) -> Dict[str, Any]:
         """Generate QR code image for the given URL"""
         try:
-            # Create QR code
-            qr = qrcode.QRCode(
-                version=1,  # Controls the size of the QR Code
-                error_correction=ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(url)
-            qr.make(fit=True)
-            
-            # Create image
-            qr_img = qr.make_image(fill_color="black", back_color="white")
-            
-            # Convert to bytes
-            img_buffer = BytesIO()
-            qr_img.save(img_buffer, format='PNG')
-            img_buffer.seek(0)
-            
-            # Encode as base64 for web display
-            img_base64 = base64.b64encode(img_buffer.getvalue()).decode('ascii')
+            png_data, size = self._render_qr_png_cached(url)
             
-            return {
+            qr_code_data = {
                 'success': True,
-                'image_base64': img_base64,
                 'mime_type': 'image/png',
-                'size': qr_img.size
+                'size': size
             }
             
+            if include_image:
+                # Encode as base64 for web display
+                qr_code_data['image_base64'] = base64.b64encode(png_data).decode('ascii')
+            
+            return qr_code_data
+            
         except Exception as e:
             return {
                 'success': False,
                 'error': f'Failed to generate QR code: {str(e)}'
             }
+    
+    def _render_qr_png(self, url: str) -> Tuple[bytes, Tuple[int, int]]:
+        """Render the QR code for a URL as PNG bytes, returning them with the image size"""
+        # Create QR code, encoding the URL as a single byte-mode segment so the
+        # version follows directly from its length instead of a make(fit=True) search
+        data = url.encode('utf-8')
+        version = self._qr_version(len(data))
+        qr = qrcode.QRCode(
+            version=version,  # Controls the size of the QR Code
+            error_correction=ERROR_CORRECT_L,
+            box_size=10,
+            border=4,
+        )
+        qr.add_data(data, optimize=0)
+        qr.make(fit=version is None)
+        
+        # Create image: scale the module matrix (border included) up to box_size pixels
+        # per module with NumPy instead of drawing each module from Python
+        modules = np.array(qr.get_matrix(), dtype=bool)
+        pixels = modules.repeat(qr.box_size, axis=0).repeat(qr.box_size, axis=1)
+        qr_img = Image.fromarray(~pixels)  # 1-bit image: dark modules black, the rest white
+        
+        # Convert to bytes; QR images are tiny, so favour deflate speed over ratio
+        img_buffer = BytesIO()
+        qr_img.save(img_buffer, format='PNG', compress_level=1)
+        
+        return img_buffer.getvalue(), qr_img.size
+
+# libzbar releases the GIL while scanning, so preprocessed variants are scanned concurrently
+_SCAN_POOL = ThreadPoolExecutor(max_workers=min(5, os.cpu_count() or 1), thread_name_prefix='qr-scan')
+
+# QR payloads that look like Meshtastic URLs: anything on meshtastic.org, or an
+# /e/# or /v/# link when the whole payload is longer than 30 characters
+_MESHTASTIC_QR_RE = re.compile(r'meshtastic\.org|^(?=.{31}).*?/[ev]/#', re.IGNORECASE | re.DOTALL)
+
+# Mirrors the fields of pyzbar's Decoded result for QR codes found by OpenCV
+DetectedQRCode = namedtuple('DetectedQRCode', ['data', 'type', 'rect'])
 
 class QRCodeProcessor:
     """Handles QR code image processing to extract URLs"""
     
-    def process_qr_image(self, image_data: bytes) -> Dict[str, Any]:
+    __slots__ = ('_results', '_results_lock', '_tls')
+    
+    # Longest image edge (in pixels) used for detection and preprocessing; larger
+    # uploads are downscaled first since QR finder patterns survive at this size
+    MAX_PREPROCESS_DIMENSION = 1500
+    
+    # Grayscale standard deviation above which an image counts as high-contrast, so the
+    # global preprocessing variants are tried before the local ones
+    HIGH_CONTRAST_STDDEV = 60
+    
+    # Largest image (in pixels) that will be decoded at all
+    MAX_IMAGE_PIXELS = 40_000_000
+    
+    # Number of processed images whose results are kept, keyed by content hash
+    RESULT_CACHE_SIZE = 128
+    
+    def __init__(self):
+        # Re-uploads of the same image are common, and detection is far more expensive than hashing
+        self._results = OrderedDict()
+        self._results_lock = threading.Lock()
+        # Per-thread OpenCV QR detectors, reused across images
+        self._tls = threading.local()
+    
+    def process_qr_image(self, image_data: bytes, executor=None) -> Dict[str, Any]:
         """
         Process an uploaded image to extract QR codes
         
         Args:
             image_data: Raw image bytes
+            executor: Optional process pool to scan the image in (see QR_WORKER_PROCESSES)
             
         Returns:
             Dictionary containing extracted URLs and processing info
         """
+        key = hashlib.blake2b(image_data, digest_size=16).digest()
+        with self._results_lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+        
+        if result is None:
+            if executor is not None:
+                result = executor.submit(_scan_qr_image, image_data).result(timeout=QR_SCAN_TIMEOUT)
+            else:
+                result = self._process_qr_image(image_data)
+            with self._results_lock:
+                self._results[key] = result
+                if len(self._results) > self.RESULT_CACHE_SIZE:
+                    self._results.popitem(last=False)
+        
+        # Cached results are shared, so give each caller its own copy
+        return copy.deepcopy(result)
+    
+    def _process_qr_image(self, image_data: bytes) -> Dict[str, Any]:
+        """Process an uploaded image without consulting the result cache"""
         try:
-            # Load image using PIL
+            # Check the dimensions from the image header before decoding any pixels, so a
+            # small, highly compressed upload cannot expand into a huge bitmap
             image = Image.open(io.BytesIO(image_data))
+            width, height = image.size
+            if width * height > self.MAX_IMAGE_PIXELS:
+                return {
+                    'success': False,
+                    'error': f'Image too large ({width}x{height}); maximum is {self.MAX_IMAGE_PIXELS} pixels',
+                    'qr_codes': []
+                }
             
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
+            # Decode straight to a single grayscale plane, which is all the detectors use;
+            # PIL is only needed for formats OpenCV cannot read (e.g. GIF)
+            gray = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_GRAYSCALE)
+            if gray is None:
+                gray = np.asarray(image.convert('L'))
             
-            # Try to decode QR codes using pyzbar
-            qr_codes = pyzbar.decode(image)
+            # Downscale huge photos; detection and every preprocessing stage are proportional
+            # to pixel count, and QR finder patterns survive at this size
+            height, width = gray.shape[:2]
+            scale = min(1.0, self.MAX_PREPROCESS_DIMENSION / max(height, width))
+            small = gray
+            if scale < 1.0:
+                small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
             
+            qr_codes = self._detect_qr_codes(small)
             if qr_codes:
+                if scale < 1.0:
+                    qr_codes = self._rescale_qr_codes(qr_codes, scale)
                 return self._process_detected_qr_codes(qr_codes)
             
-            # If no QR codes found with pyzbar, try OpenCV preprocessing
-            return self._try_opencv_preprocessing(image_data)
+            # Codes with very small modules may not survive the downscale, so retry once at full size
+            if scale < 1.0:
+                qr_codes = self._detect_qr_codes(gray)
+                if qr_codes:
+                    return self._process_detected_qr_codes(qr_codes)
+            
+            # If no QR codes found directly, try OpenCV preprocessing on the downscaled image
+            return self._try_opencv_preprocessing(small, scale)
             
         except Exception as e:
             return {
@@ -656,6 +1009,66 @@ class QRCodeProcessor:
                 'qr_codes': []
             }
     
+    def _detect_qr_codes(self, gray) -> List:
+        """Detect QR codes without preprocessing, trying zxing-cpp (if installed), OpenCV and then pyzbar"""
+        if zxingcpp is not None:
+            qr_codes = self._read_with_zxing(gray)
+            if qr_codes:
+                return qr_codes
+        
+        # Try OpenCV's QR detector, which detects and decodes in one C++ call
+        qr_codes = self._detect_with_opencv(gray)
+        if qr_codes:
+            return qr_codes
+        
+        # Try to decode QR codes using pyzbar
+        return self._decode_with_pyzbar(gray)
+    
+    def _read_with_zxing(self, gray) -> List[DetectedQRCode]:
+        """Detect and decode QR codes using zxing-cpp"""
+        qr_codes = []
+        for barcode in zxingcpp.read_barcodes(gray, formats=zxingcpp.BarcodeFormat.QRCode):
+            if not barcode.valid or not barcode.text:
+                continue
+            position = barcode.position
+            corners = (position.top_left, position.top_right, position.bottom_right, position.bottom_left)
+            xs = [point.x for point in corners]
+            ys = [point.y for point in corners]
+            rect = Rect(min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+            qr_codes.append(DetectedQRCode(barcode.text.encode('utf-8'), 'QRCODE', rect))
+        
+        return qr_codes
+    
+    def _detect_with_opencv(self, gray) -> List[DetectedQRCode]:
+        """Detect and decode QR codes using OpenCV's QRCodeDetector"""
+        detector = self._detector()
+        try:
+            found, decoded_info, points, _ = detector.detectAndDecodeMulti(gray)
+        except cv2.error:
+            return []
+        
+        if not found:
+            return []
+        
+        qr_codes = []
+        for data, corners in zip(decoded_info, points):
+            # Codes that were located but could not be decoded come back empty
+            if not data:
+                continue
+            x, y, width, height = cv2.boundingRect(corners)
+            qr_codes.append(DetectedQRCode(data.encode('utf-8'), 'QRCODE', Rect(x, y, width, height)))
+        
+        return qr_codes
+    
+    def _detector(self):
+        """Return this thread's QRCodeDetector, creating it on first use"""
+        # Detectors keep internal buffers between calls, so they are not shared across threads;
+        # creating them lazily also keeps OpenCV unloaded until an image is scanned
+        detector = getattr(self._tls, 'detector', None)
+        if detector is None:
+            detector = self._tls.detector = cv2.QRCodeDetector()
+        return detector
+    
     def _process_detected_qr_codes(self, qr_codes: List) -> Dict[str, Any]:
         """Process detected QR codes and extract URLs"""
         results = []
@@ -692,27 +1105,37 @@ class QRCodeProcessor:
             'meshtastic_count': len(meshtastic_urls)
         }
     
-    def _try_opencv_preprocessing(self, image_data: bytes) -> Dict[str, Any]:
-        """Try OpenCV preprocessing to enhance QR code detection"""
+    def _try_opencv_preprocessing(self, gray, scale: float = 1.0) -> Dict[str, Any]:
+        """
+        Try OpenCV preprocessing to enhance QR code detection
+        
+        gray has already been scanned as-is and downscaled from the upload by scale.
+        """
         try:
-            # Convert to numpy array for OpenCV
-            nparr = np.frombuffer(image_data, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if img is None:
-                raise ValueError("Could not decode image with OpenCV")
-            
-            # Try different preprocessing techniques
-            preprocessed_images = self._preprocess_image(img)
-            
-            for processed_img in preprocessed_images:
-                # Convert back to PIL Image
-                pil_img = Image.fromarray(cv2.cvtColor(processed_img, cv2.COLOR_BGR2RGB))
+            # Try different preprocessing techniques: each variant is scanned on the pool while
+            # the next one is being prepared, and preprocessing stops once any scan decodes
+            qr_codes = []
+            pending = set()
+            try:
+                for processed_img in self._preprocess_image(gray):
+                    pending.add(_SCAN_POOL.submit(self._decode_with_pyzbar, processed_img))
+                    done, pending = wait(pending, timeout=0)
+                    qr_codes = self._first_decoded(done)
+                    if qr_codes:
+                        break
                 
-                # Try to decode QR codes
-                qr_codes = pyzbar.decode(pil_img)
-                if qr_codes:
-                    return self._process_detected_qr_codes(qr_codes)
+                while not qr_codes and pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    qr_codes = self._first_decoded(done)
+            finally:
+                # Drop scans that have not started yet
+                for future in pending:
+                    future.cancel()
+            
+            if qr_codes:
+                if scale < 1.0:
+                    qr_codes = self._rescale_qr_codes(qr_codes, scale)
+                return self._process_detected_qr_codes(qr_codes)
             
             # No QR codes found even with preprocessing
             return {
@@ -729,43 +1152,125 @@ class QRCodeProcessor:
                 'qr_codes': []
             }
     
-    def _preprocess_image(self, img):
-        """Apply various preprocessing techniques to enhance QR code detection"""
-        processed_images = []
-        
-        # Original image
-        processed_images.append(img.copy())
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    def _first_decoded(self, futures) -> List:
+        """Return the QR codes from the first finished scan that found any"""
+        for future in futures:
+            qr_codes = future.result()
+            if qr_codes:
+                return qr_codes
+        return []
+    
+    def _rescale_qr_codes(self, qr_codes: List, scale: float) -> List:
+        """Map QR code rectangles found on a downscaled image back to original image coordinates"""
+        return [
+            qr._replace(rect=Rect(
+                round(qr.rect.left / scale),
+                round(qr.rect.top / scale),
+                round(qr.rect.width / scale),
+                round(qr.rect.height / scale)
+            ))
+            for qr in qr_codes
+        ]
+    
+    def _decode_with_pyzbar(self, gray) -> List:
+        """Decode QR codes from a single-channel uint8 image with pyzbar"""
+        height, width = gray.shape[:2]
+        return pyzbar.decode((gray.tobytes(), width, height), symbols=[pyzbar.ZBarSymbol.QRCODE])
+    
+    def _preprocess_image(self, gray):
+        """
+        Apply various preprocessing techniques to enhance QR code detection
         
+        Yields grayscale variants one at a time so the caller can stop as soon as one decodes.
+        The unprocessed image is not included; it is always scanned before preprocessing.
+        """
+        # Order the variants by what usually works for this image: global (blur/Otsu) passes
+        # suit well-lit, high-contrast photos, local ones suit dim or unevenly lit ones
+        _, stddev = cv2.meanStdDev(gray)
+        if stddev[0][0] >= self.HIGH_CONTRAST_STDDEV:
+            yield from self._global_variants(gray)
+            yield from self._local_variants(gray)
+        else:
+            yield from self._local_variants(gray)
+            yield from self._global_variants(gray)
+    
+    def _global_variants(self, gray):
+        """Yield variants that treat the image as a whole"""
         # Gaussian blur
         blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        processed_images.append(cv2.cvtColor(blurred, cv2.COLOR_GRAY2BGR))
+        yield blurred
         
-        # Thresholding
-        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        processed_images.append(cv2.cvtColor(thresh, cv2.COLOR_GRAY2BGR))
+        # Thresholding: Otsu on the blurred image, which suppresses sensor noise and reuses
+        # the buffer just computed instead of sweeping the original again
+        _, thresh = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        yield thresh
+    
+    def _local_variants(self, gray):
+        """Yield variants that enhance contrast and edges locally"""
+        # Contrast stretch to the full 0-255 range, for washed-out or dim photos
+        # (skipped when the image already spans it, as the stretch would change nothing)
+        min_value, max_value, _, _ = cv2.minMaxLoc(gray)
+        if min_value > 0 or max_value < 255:
+            yield cv2.normalize(gray, None, 0, 255, cv2.NORM_MINMAX)
         
         # Adaptive thresholding
-        adaptive_thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
-        processed_images.append(cv2.cvtColor(adaptive_thresh, cv2.COLOR_GRAY2BGR))
-        
-        # Sharpen the image
-        kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-        sharpened = cv2.filter2D(gray, -1, kernel)
-        processed_images.append(cv2.cvtColor(sharpened, cv2.COLOR_GRAY2BGR))
+        yield cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
         
-        return processed_images
+        # Sharpen the image: the [[-1,-1,-1],[-1,9,-1],[-1,-1,-1]] kernel is 10 * gray minus the
+        # 3x3 neighbourhood sum, taken with OpenCV's O(1)-per-pixel box filter in 16-bit so the
+        # result matches filter2D exactly (saturated back to 8-bit)
+        neighbourhood = cv2.boxFilter(gray, cv2.CV_16S, (3, 3), normalize=False)
+        yield cv2.subtract(cv2.multiply(gray, 10, dtype=cv2.CV_16S), neighbourhood, dtype=cv2.CV_8U)
     
     def _is_meshtastic_url(self, url: str) -> bool:
         """Check if a URL looks like a Meshtastic URL"""
-        url_lower = url.lower()
-        return (
-            'meshtastic.org' in url_lower or
-            ('/e/#' in url_lower and len(url) > 30) or
-            ('/v/#' in url_lower and len(url) > 30)
-        )
+        return _MESHTASTIC_QR_RE.search(url) is not None
+
+# base64url payload of a Meshtastic URL, as used in /qr/ image paths
+_QR_PAYLOAD_RE = re.compile(r'[A-Za-z0-9_-]+')
+
+# Worker threads for decoding the URLs found in one uploaded image
+_DECODE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='url-decode')
+
+# Maximum number of configurations accepted by /encode_batch
+MAX_BATCH_ITEMS = 100
+
+# Cache lifetime of /qr/ images (one year; the content never changes for a path)
+QR_IMAGE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Number of worker processes QR images are scanned in; 0 scans on the request thread.
+# Workers are spawned (not forked, which is unsafe with the scan threads) and each
+# imports this module once, so they only pay off on servers handling concurrent uploads
+QR_WORKER_PROCESSES = int(os.environ.get('QR_WORKER_PROCESSES', '0'))
+
+# Seconds an upload may wait for a worker process to scan it
+QR_SCAN_TIMEOUT = 30
+
+_QR_POOL = None
+_QR_POOL_LOCK = threading.Lock()
+
+def _qr_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Return the QR worker pool, creating it on first use, or None if it is disabled
+    
+    The pool is created lazily by the process that serves uploads, so a server that
+    forks workers after importing the app (or a spawned QR worker, which imports this
+    module again) never inherits or builds a pool it cannot use.
+    """
+    global _QR_POOL
+    if QR_WORKER_PROCESSES <= 0:
+        return None
+    with _QR_POOL_LOCK:
+        if _QR_POOL is None:
+            _QR_POOL = ProcessPoolExecutor(
+                max_workers=QR_WORKER_PROCESSES,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _QR_POOL
+
+def _scan_qr_image(image_data: bytes) -> Dict[str, Any]:
+    """Scan an image in a QR worker process, using that process's own QR processor"""
+    return qr_processor._process_qr_image(image_data)
 
 # Initialize decoder, encoder, and QR processor
 decoder = MeshtasticDecoder()
@@ -803,40 +1308,41 @@ def upload_qr():
         return jsonify({'success': False, 'error': 'No file selected'}), 400
     
     # Check file type
-    allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'}
-    if not ('.' in file.filename and 
-            file.filename.rsplit('.', 1)[1].lower() in allowed_extensions):
+    if os.path.splitext(file.filename)[1].lower() not in ALLOWED_EXTENSIONS:
         return jsonify({
             'success': False, 
             'error': 'Invalid file type. Please upload an image file.'
         }), 400
     
     try:
-        # Read the image data
-        image_data = file.read()
+        # Read the image data, never more than one byte past the limit
+        image_data = file.stream.read(MAX_UPLOAD_SIZE + 1)
         
         # Check file size (max 10MB)
-        max_size = 10 * 1024 * 1024  # 10MB
-        if len(image_data) > max_size:
+        if len(image_data) > MAX_UPLOAD_SIZE:
             return jsonify({
                 'success': False,
                 'error': 'File too large. Maximum size is 10MB.'
-            }), 400
+            }), 413
         
         # Process the QR codes
-        qr_result = qr_processor.process_qr_image(image_data)
+        qr_result = qr_processor.process_qr_image(image_data, executor=_qr_pool())
         
         # If we found Meshtastic URLs, decode them
         if qr_result.get('success') and qr_result.get('meshtastic_urls'):
-            decoded_results = []
-            for url in qr_result['meshtastic_urls']:
-                decode_result = decoder.decode_channel_url(url)
-                decoded_results.append({
-                    'url': url,
-                    'decoded': decode_result
-                })
+            # Decode each distinct URL once, in the order found (images may repeat a code)
+            urls = list(dict.fromkeys(qr_result['meshtastic_urls']))
             
-            qr_result['decoded_results'] = decoded_results
+            # The decodes are independent, so multi-code images decode them concurrently
+            if len(urls) > 1:
+                decode_results = _DECODE_POOL.map(decoder.decode_channel_url, urls)
+            else:
+                decode_results = map(decoder.decode_channel_url, urls)
+            
+            qr_result['decoded_results'] = [
+                {'url': url, 'decoded': decode_result}
+                for url, decode_result in zip(urls, decode_results)
+            ]
         
         return jsonify(qr_result)
         
@@ -854,6 +1360,40 @@ def encode_channels():
     if not data:
         return jsonify({'success': False, 'error': 'No data provided'}), 400
     
+    # The QR image is served from qr_code_url; embedding it as base64 is opt-in (?format=base64)
+    include_qr_image = request.args.get('format') == 'base64'
+    
+    result, status = _encode_request_data(data, include_qr_image)
+    return jsonify(result), status
+
+@app.route('/encode_batch', methods=['POST'])
+def encode_channels_batch():
+    """API endpoint to encode several channel configurations (each as accepted by /encode) in one request"""
+    data = request.get_json()
+    
+    items = data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return jsonify({'success': False, 'error': 'No items provided'}), 400
+    
+    if len(items) > MAX_BATCH_ITEMS:
+        return jsonify({
+            'success': False,
+            'error': f'Too many items. Maximum is {MAX_BATCH_ITEMS} per batch.'
+        }), 400
+    
+    include_qr_image = request.args.get('format') == 'base64'
+    
+    # Each item gets its own result, so one invalid configuration does not fail the batch
+    results = [
+        _encode_request_data(item, include_qr_image)[0] if isinstance(item, dict) and item
+        else {'success': False, 'error': 'No data provided'}
+        for item in items
+    ]
+    
+    return jsonify({'success': True, 'results': results})
+
+def _encode_request_data(data: Dict[str, Any], include_qr_image: bool):
+    """Encode one /encode request body, returning the result and its HTTP status"""
     # Get LoRa config if provided
     lora_config = data.get('lora_config')
     
@@ -862,28 +1402,59 @@ def encode_channels():
         # Multiple channels - encode as ChannelSet
         channels_data = data['channels']
         if not channels_data:
-            return jsonify({'success': False, 'error': 'No channels provided'}), 400
+            return {'success': False, 'error': 'No channels provided'}, 400
         
-        result = encoder.encode_channel_set(channels_data, lora_config)
+        return encoder.encode_channel_set(channels_data, lora_config, include_qr_image), 200
     elif 'channel' in data:
         # Single channel - encode as single Channel (legacy support)
         channel_data = data['channel']
         if not channel_data:
-            return jsonify({'success': False, 'error': 'No channel data provided'}), 400
+            return {'success': False, 'error': 'No channel data provided'}, 400
         
-        result = encoder.encode_single_channel(channel_data)
+        return encoder.encode_single_channel(channel_data, include_qr_image), 200
     else:
-        return jsonify({
+        return {
             'success': False, 
             'error': 'Invalid request format. Expected "channels" array or "channel" object.'
-        }), 400
+        }, 400
+
+@app.route('/qr/<url_type>/<encoded_data>.png')
+def qr_code_image(url_type, encoded_data):
+    """Serve the QR code PNG for a Meshtastic URL, addressed by the URL's own type and payload"""
+    if url_type not in ('e', 'v') or not _QR_PAYLOAD_RE.fullmatch(encoded_data):
+        return jsonify({'success': False, 'error': 'Invalid QR code path'}), 404
     
-    return jsonify(result)
+    try:
+        png_data = encoder.qr_code_png(f"https://meshtastic.org/{url_type}/#{encoded_data}")
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Failed to generate QR code: {str(e)}'}), 400
+    
+    # The path fully determines the image, so browsers may cache it indefinitely
+    response = send_file(BytesIO(png_data), mimetype='image/png', max_age=QR_IMAGE_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    """Report bodies rejected by MAX_CONTENT_LENGTH as JSON, like the other API errors"""
+    if request.endpoint == 'upload_qr':
+        error = 'File too large. Maximum size is 10MB.'
+    else:
+        error = 'Request too large.'
+    return jsonify({
+        'success': False,
+        'error': error
+    }), 413
 
 @app.route('/health')
 def health():
     """Health check endpoint"""
-    return jsonify({'status': 'ok', 'service': 'meshtastic-decoder'})
+    return jsonify({
+        'status': 'ok',
+        'service': 'meshtastic-decoder',
+        'protobuf_backend': api_implementation.Type(),
+        'base64_backend': BASE64_BACKEND
+    })
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5001)
@@ -5,8 +5,9 @@ Standalone script to decode Meshtastic channel URLs from the command line.
 """
 
 import sys
-import json
 import argparse
+
+import orjson
 from app import MeshtasticDecoder
 
 def main():
@@ -53,9 +54,9 @@ Examples:
         else:
             # Default to JSON output
             if args.pretty:
-                print(json.dumps(result, indent=2))
+                print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode('utf-8'))
             else:
-                print(json.dumps(result))
+                print(orjson.dumps(result).decode('utf-8'))
                 
     except KeyboardInterrupt:
         print("\nOperation cancelled by user", file=sys.stderr)
@@ -122,29 +123,47 @@ def display_summary(result):
 
 def _print_dict_summary(data, indent="", max_depth=3, current_depth=0):
     """Helper function to print dictionary data in a readable format"""
-    if current_depth >= max_depth:
-        print(f"{indent}[...truncated...]")
-        return
+    # Walk the nested data with an explicit stack (pending output lines and
+    # (dict, indent, depth) frames) and write everything out in one call
+    lines = []
+    stack = [(data, indent, current_depth)]
+    while stack:
+        entry = stack.pop()
+        if isinstance(entry, str):
+            lines.append(entry)
+            continue
         
-    for key, value in data.items():
-        if isinstance(value, dict):
-            print(f"{indent}{key}:")
-            _print_dict_summary(value, indent + "  ", max_depth, current_depth + 1)
-        elif isinstance(value, list):
-            print(f"{indent}{key}: [{len(value)} items]")
-            for i, item in enumerate(value[:3]):  # Show first 3 items
-                if isinstance(item, dict):
-                    print(f"{indent}  [{i}]:")
-                    _print_dict_summary(item, indent + "    ", max_depth, current_depth + 2)
-                else:
-                    print(f"{indent}  [{i}]: {item}")
-            if len(value) > 3:
-                print(f"{indent}  ...and {len(value) - 3} more")
-        else:
-            # Truncate very long strings
-            if isinstance(value, str) and len(value) > 50:
-                value = value[:47] + "..."
-            print(f"{indent}{key}: {value}")
+        data, indent, depth = entry
+        if depth >= max_depth:
+            lines.append(f"{indent}[...truncated...]")
+            continue
+        
+        pending = []
+        for key, value in data.items():
+            if isinstance(value, dict):
+                pending.append(f"{indent}{key}:")
+                pending.append((value, indent + "  ", depth + 1))
+            elif isinstance(value, list):
+                pending.append(f"{indent}{key}: [{len(value)} items]")
+                for i, item in enumerate(value[:3]):  # Show first 3 items
+                    if isinstance(item, dict):
+                        pending.append(f"{indent}  [{i}]:")
+                        pending.append((item, indent + "    ", depth + 2))
+                    else:
+                        pending.append(f"{indent}  [{i}]: {item}")
+                if len(value) > 3:
+                    pending.append(f"{indent}  ...and {len(value) - 3} more")
+            else:
+                # Truncate very long strings
+                if isinstance(value, str) and len(value) > 50:
+                    value = value[:47] + "..."
+                pending.append(f"{indent}{key}: {value}")
+        
+        # Push in reverse so this dict's entries come off the stack in order
+        stack.extend(reversed(pending))
+    
+    if lines:
+        sys.stdout.write('\n'.join(lines) + '\n')
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Differential tests for PSK parsing in the encoder.
+_parse_psk must turn every PSK string into the same key bytes as the original parser.
+Run from the repository root with: python -m unittest discover tests
+"""
+
+import base64
+import random
+import unittest
+
+from app import _parse_psk
+
+
+def original_parse_psk(psk_str):
+    """The PSK parser as originally written in the encoder"""
+    try:
+        if psk_str.startswith('0x'):
+            return bytes.fromhex(psk_str[2:])
+        else:
+            # Try as base64
+            return base64.b64decode(psk_str)
+    except:
+        # If all else fails, use as UTF-8 bytes (not recommended but fallback)
+        return psk_str.encode('utf-8')[:32]  # Limit to 32 bytes
+
+
+class ParsePskTest(unittest.TestCase):
+    CASES = [
+        # Well-formed keys
+        'AQ==', '1PG7OiApB1nwvP+rz05pAQ==', 'abcd', '0x0102', '0x', '0xABcd',
+        # Text that merely looks like base64url
+        'secret-key-12345', 'hunter2_', 'my_pass-word1234',
+        # Base64 with whitespace or stray characters (accepted by the non-validating decoder)
+        ' AQ== ', 'AQIDBAUGBwgJCgsMDQ4PEA==\n', 'AQ==AQ==', 'abc=d', 'AQ==x', 'A=Q=',
+        # 0x-prefixed strings that are not valid hex
+        '0xZZ', '0x12345g', '0x012', '0x01 02', '0x 01', '0xAQ==',
+        # Plain text
+        'abc', 'hello world', 'héllo', '🔑key',
+    ]
+
+    # Characters the fuzzed PSKs are built from: both base64 alphabets, padding,
+    # whitespace, hex-only and non-hex letters, and a non-ASCII character
+    FUZZ_ALPHABET = 'AQZzg09+/-_= \n0xé'
+
+    def assert_same_key(self, psk_str):
+        self.assertEqual(_parse_psk(psk_str), original_parse_psk(psk_str), repr(psk_str))
+
+    def test_known_cases(self):
+        for psk_str in self.CASES:
+            self.assert_same_key(psk_str)
+
+    def test_fuzzed_strings(self):
+        rng = random.Random(0)
+        for _ in range(20000):
+            psk_str = ''.join(rng.choice(self.FUZZ_ALPHABET) for _ in range(rng.randint(1, 12)))
+            if rng.random() < 0.3:
+                psk_str = '0x' + psk_str
+            self.assert_same_key(psk_str)
+
+
+if __name__ == '__main__':
+    unittest.main()